@@ -1,19 +1,50 @@
 from abc import ABC, abstractmethod
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageStat
 import random
+import math
 from typing import Optional, Tuple
 from copy import deepcopy
+import numpy as np
+
+from .Compositing import to_image
+from .Genealogy import Genealogy
+
+MIN_MUTATION_SCALE = 0.05
+MAX_MUTATION_SCALE = 2.0
+
+
+def adapt_mutation_scale(scale: float, success_rate: float) -> float:
+    """
+    1/5th success rule: the step size is stationary when one child in five beats its parent, shrinks
+    below that rate and grows above it (by exp(-1/12) at 0, exp(1/3) at 1).
+    """
+    scale *= math.exp((success_rate - 1 / 5) * 5 / 12)
+    return max(MIN_MUTATION_SCALE, min(scale, MAX_MUTATION_SCALE))
+
 
 class AbstractIndividual(ABC):
+    ORIENTATION_SPREAD = 10.0  # Degrees of noise around a rotation taken from the orientation field
+    REALIGN_PROBABILITY = 0.25  # Chance that a mutation re-reads rotation from the field instead of jittering it
+    # Rendered by apply_transformations or shared between clones, so left out of genome()
+    PHENOTYPE_ATTRIBUTES = ("_coverage", "lineage", "orientation_field")
+
     def __init__(self, canvas_size: Tuple[int, int] = None, name: Optional[str] = "Unnamed", genealogy=None, replication_factor: int = 1):
         self.name = name
         self.canvas_size = canvas_size
         self.center = (0, 0)
         self.position = (0, 0)
         self.children_count = 0
-        self.genealogy = genealogy if genealogy is not None else []
+        self.lineage = Genealogy()
+        self.lineage_id = self.lineage.add_path(genealogy if genealogy is not None else [])
         self.replication_factor = replication_factor
-
+        # Phenotype: a uint8 (H, W) coverage mask (255 = opaque) plus a flat color applied at composite time
+        self.color = (255, 255, 255)
+        self._coverage = None
+        # Step size, carried in the genome and inherited by children. Stays at 1.0 (the fixed
+        # mutation ranges) unless the tournament adapts it, see adapt_mutation_scale.
+        self.mutation_scale = 1.0
+        # Optional OrientationField of the target, shared by every clone. Elongated shapes align with it.
+        self.orientation_field = None
 
     @abstractmethod
     def get_position(self) -> Tuple[int, int]:
@@ -24,13 +55,27 @@ class AbstractIndividual(ABC):
         pass
 
     @property
-    @abstractmethod
+    def genealogy(self) -> list[int]:
+        # Rebuilt from the shared lineage arena; empty when lineage tracking is switched off
+        return self.lineage.path(self.lineage_id)
+
+    @property
+    def coverage(self) -> np.ndarray:
+        return self._coverage
+
+    @property
+    def shade(self) -> np.ndarray:
+        # Coverage scaled by per-pixel luminance. Flat shapes are fully lit.
+        return self._coverage
+
+    @property
     def image(self) -> Image.Image:
-        pass
+        # Rendered on demand for display and export only; compositing reads coverage/shade/color directly
+        return to_image(self.coverage, self.shade, self.color)
 
-    @abstractmethod
     def get_transformed_bbox(self) -> Tuple[int, int, int, int]:
-        pass
+        x, y = self.position
+        return (x, y, x + self._coverage.shape[1], y + self._coverage.shape[0])
 
     @abstractmethod
     def reset_attributes(self, canvas_size: Tuple[int, int]) -> None:
@@ -44,13 +89,52 @@ class AbstractIndividual(ABC):
     def mutate(self) -> None:
         pass
 
+    def genome_key(self) -> Optional[tuple]:
+        # Hashable summary of everything that determines the phenotype, used to memoize fitness.
+        # None disables caching for this individual.
+        return None
+
+    def genome(self) -> tuple:
+        """
+        Compact picklable description (class, attributes) without the rendered rasters.
+        from_genome() renders an equivalent individual from it, e.g. on an evaluation worker.
+        """
+        attributes = {name: value for name, value in self.__dict__.items() if name not in self.PHENOTYPE_ATTRIBUTES}
+        return (type(self), attributes)
+
+    @classmethod
+    def from_genome(cls, attributes: dict, sprites: Optional[dict] = None) -> "AbstractIndividual":
+        individual = cls.__new__(cls)
+        individual.__dict__.update(attributes)
+        individual.apply_transformations()
+        return individual
+
+    def jitter(self, amplitude: float) -> float:
+        return random.uniform(-amplitude, amplitude) * self.mutation_scale
+
+    def aligned_rotation(self, long_side_horizontal: bool = True) -> Optional[float]:
+        # Rotation along the target's structure at center, taken with probability equal to the field's
+        # confidence there. None means the caller keeps its own rotation.
+        if self.orientation_field is None:
+            return None
+        rotation, confidence = self.orientation_field.rotation(self.center, long_side_horizontal)
+        if random.random() >= confidence:
+            return None
+        return rotation + random.gauss(0, self.ORIENTATION_SPREAD)
+
+    def mutate_rotation(self, rotation: float, amplitude: float, long_side_horizontal: bool = True) -> float:
+        if self.orientation_field is not None and random.random() < self.REALIGN_PROBABILITY:
+            aligned = self.aligned_rotation(long_side_horizontal)
+            if aligned is not None:
+                return aligned
+        return rotation + self.jitter(amplitude)
+
     @abstractmethod
     def reproduce(self):
         pass
 
-    @abstractmethod
     def recolor_to_region(self, region_img: Image.Image):
-        pass
+        self.color = tuple(map(int, ImageStat.Stat(region_img.convert("RGB")).mean))
 
     @abstractmethod
     def __str__(self) -> str:
@@ -0,0 +1,119 @@
+import math
+import time
+from typing import Optional, Tuple
+
+
+class BudgetScheduler:
+    """
+    Sizes each tournament to make the most of a wall-clock budget.
+
+    The scheduler works in terms of effort: a multiplier on the evaluations of the base tournament
+    (base population x base generations). It measures live throughput as seconds per unit of effort
+    and gives each tournament the larger of two efforts:
+
+    - the deadline effort, which spreads the remaining time evenly over the remaining tournaments,
+      so a run with time to spare makes every tournament bigger instead of finishing early;
+    - the efficient effort, the one with the best fitness gain per second. It is found by an A/B
+      hill-climb: tournaments alternate between efficient * step and efficient / step, and after
+      `window` tournaments on each arm the effort moves towards the arm with the higher gain rate.
+      Interleaving the arms cancels the steady fall in gain rate as the canvas fills up, which a
+      comparison between consecutive windows would read as every change being for the worse.
+
+    Effort is split evenly (by square root) between population size and generations, and the last
+    tournament is shrunk so the run ends by the deadline.
+    """
+
+    def __init__(self,
+                 time_budget: float,
+                 generations: int,
+                 tournaments: int,
+                 window: int = 3,
+                 step: float = 1.3,
+                 min_effort: float = 0.1,
+                 max_effort: float = 64.0,
+                 min_generations: int = 2):
+        self.time_budget = time_budget
+        self.base_generations = generations
+        self.tournaments = tournaments
+        self.window = window
+        self.step = step
+        self.min_effort = min_effort
+        self.max_effort = max_effort
+        self.min_generations = min_generations
+
+        self.effort = 1.0
+        self.efficient_effort = 1.0
+        self.deadline = None
+        self.remaining_tournaments = tournaments
+        self.seconds_per_effort: Optional[float] = None
+        self.evaluations_per_second: Optional[float] = None
+
+        # A/B arms of the hill-climb: +1 probes efficient * step, -1 efficient / step
+        self.arm = 1
+        self.probing = False
+        self.arm_gain = {1: 0.0, -1: 0.0}
+        self.arm_time = {1: 0.0, -1: 0.0}
+        self.arm_count = {1: 0, -1: 0}
+
+    def start(self) -> None:
+        self.deadline = time.perf_counter() + self.time_budget
+        self.remaining_tournaments = self.tournaments
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def record(self, evaluations: int, gain: float, elapsed: float) -> None:
+        elapsed = max(elapsed, 1e-6)
+        self.remaining_tournaments -= 1
+        self.seconds_per_effort = self.smooth(self.seconds_per_effort, elapsed / self.effort)
+        self.evaluations_per_second = self.smooth(self.evaluations_per_second, evaluations / elapsed)
+        if not self.probing:
+            return
+
+        self.arm_gain[self.arm] += gain
+        self.arm_time[self.arm] += elapsed
+        self.arm_count[self.arm] += 1
+        self.arm = -self.arm
+        if min(self.arm_count.values()) < self.window:
+            return
+
+        better = 1 if self.arm_gain[1] / self.arm_time[1] > self.arm_gain[-1] / self.arm_time[-1] else -1
+        self.efficient_effort = self.clamp(self.efficient_effort * self.step ** better)
+        self.arm_gain, self.arm_time, self.arm_count = {1: 0.0, -1: 0.0}, {1: 0.0, -1: 0.0}, {1: 0, -1: 0}
+
+    def fits(self) -> bool:
+        """
+        Chooses the next tournament's effort. Returns False when no tournament fits in the remaining
+        budget anymore.
+        """
+        remaining = self.remaining()
+        if remaining <= 0 or self.remaining_tournaments <= 0:
+            return False
+        if self.seconds_per_effort is None:
+            self.effort, self.probing = self.efficient_effort, False
+            return True
+
+        affordable = remaining / self.seconds_per_effort
+        if affordable < self.min_effort:
+            return False
+        deadline_effort = affordable / self.remaining_tournaments
+        probe_effort = self.clamp(self.efficient_effort * self.step ** self.arm)
+        # Only tournaments run at the probe effort tell the arms apart
+        self.probing = probe_effort >= deadline_effort and probe_effort <= affordable
+        self.effort = self.clamp(min(max(deadline_effort, probe_effort), affordable))
+        return True
+
+    def plan(self) -> Tuple[float, int]:
+        """
+        Returns (population_scale, generations) for the next tournament.
+        """
+        generations = max(self.min_generations, round(self.base_generations * math.sqrt(self.effort)))
+        population_scale = self.effort * self.base_generations / generations
+        return population_scale, generations
+
+    def clamp(self, effort: float) -> float:
+        return max(self.min_effort, min(effort, self.max_effort))
+
+    @staticmethod
+    def smooth(previous: Optional[float], value: float, weight: float = 0.3) -> float:
+        return value if previous is None else (1 - weight) * previous + weight * value
@@ -1,24 +1,58 @@
 ### Canvas.py (refactored)
-from PIL import Image, ImageStat
-from .Individual import Individual
+from PIL import Image
+import numpy as np
+from .AbstractIndividual import AbstractIndividual
+from .Compositing import clip_to_canvas, composite
+from .StrokePruning import prune_strokes
 
 class Canvas:
-    def __init__(self, size, target_image: Image.Image):
+    def __init__(self, size, target_image: Image.Image, record_strokes=False):
         self.size = size
         self.target_image = target_image
 
-        # Compute mean RGB color from the target image
-        stat = ImageStat.Stat(target_image.convert("RGB"))
-        mean_color = tuple(map(int, stat.mean))
-
-        # self.image = Image.new("RGB", size, mean_color)
-        self.image = Image.new("RGB", size, (0, 0, 0))
+        # The canvas is kept as a float32 (H, W, 3) array; self.image is derived from it on demand
+        self.pixels = np.zeros((size[1], size[0], 3), dtype=np.float32)
         self.subimageCounter = 0
+        # Regions touched by each commit; version counts commits so caches can catch up lazily
+        self.dirty_rects = []
+        # Committed strokes as (coverage, shade, color, position), in order. Only kept with record_strokes,
+        # since the rasters add up to hundreds of MB over long runs and only pruning needs them.
+        self.record_strokes = record_strokes
+        self.strokes = []
+
+    @property
+    def version(self) -> int:
+        return len(self.dirty_rects)
+
+    @property
+    def image(self) -> Image.Image:
+        return Image.fromarray(self.snapshot())
 
-    def apply_individual(self, individual: Individual):
-        try:
-            self.image.paste(individual.image, individual.position, individual.image.convert("RGBA"))
-        except ValueError:
-            self.image.paste(individual.image, individual.position)
+    def snapshot(self, region=None) -> np.ndarray:
+        # uint8 copy of the canvas, or of its (x1, y1, x2, y2) region
+        pixels = self.pixels if region is None else self.pixels[region[1]:region[3], region[0]:region[2]]
+        return np.clip(pixels + 0.5, 0, 255).astype(np.uint8)
+
+    def apply_individual(self, individual: AbstractIndividual):
+        region = composite(self.pixels, individual.coverage, individual.shade, individual.color, individual.position)
+        if region is not None:
+            self.dirty_rects.append(region)
+            if self.record_strokes:
+                self.strokes.append((individual.coverage, individual.shade, individual.color, individual.position))
         self.subimageCounter += 1
-        print(f"Canvas now has {self.subimageCounter} subimages.")
\ No newline at end of file
+        print(f"Canvas now has {self.subimageCounter} subimages.")
+
+    def prune(self, target_pixels: np.ndarray) -> dict:
+        """
+        Drops fully occluded and net-zero strokes (see StrokePruning.prune_strokes) and re-renders.
+        Needs a canvas created with record_strokes=True.
+        """
+        if not self.record_strokes:
+            raise RuntimeError("Canvas.prune needs record_strokes=True")
+        keep, self.pixels, report = prune_strokes(self.strokes, target_pixels)
+        for (coverage, _, _, position), kept in zip(self.strokes, keep):
+            if not kept:
+                self.dirty_rects.append(clip_to_canvas(position, (coverage.shape[1], coverage.shape[0]), self.size))
+        self.strokes = [stroke for stroke, kept in zip(self.strokes, keep) if kept]
+        self.subimageCounter = len(self.strokes)
+        return report
@@ -1,4 +1,4 @@
-from PIL import Image, ImageDraw, ImageStat
+from PIL import Image, ImageDraw
 import random
 from typing import Optional, Tuple
 from copy import deepcopy
@@ -6,6 +6,7 @@ import math
 import numpy as np
 
 from .AbstractIndividual import AbstractIndividual
+from .Compositing import to_coverage
 
 
 class CircleIndividual(AbstractIndividual):
@@ -13,7 +14,6 @@ class CircleIndividual(AbstractIndividual):
         self.MAX_INITIAL_AREA_COVERAGE = 0.5
         self.MIN_DIAMETER = 4
         self.diameter: int
-        self._image = None
         super().__init__(**kwargs)
 
     def get_position(self):
@@ -22,14 +22,6 @@ class CircleIndividual(AbstractIndividual):
     def get_canvas_size(self):
         return self.canvas_size
 
-    @property
-    def image(self):
-        return self._image
-
-    def get_transformed_bbox(self):
-        x, y = self.position
-        return (x, y, x + self.diameter, y + self.diameter)
-
     def reset_attributes(self, canvas_size):
         self.canvas_size = canvas_size
         self.center = (random.randint(0, canvas_size[0]), random.randint(0, canvas_size[1]))
@@ -45,28 +37,27 @@ class CircleIndividual(AbstractIndividual):
         self.apply_transformations()
 
     def apply_transformations(self):
-        self._image = Image.new("RGBA", (self.diameter, self.diameter), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(self._image)
-        draw.ellipse([0, 0, self.diameter, self.diameter], fill=(255, 255, 255, 255))
+        mask = Image.new("L", (self.diameter, self.diameter), 0)
+        draw = ImageDraw.Draw(mask)
+        draw.ellipse([0, 0, self.diameter, self.diameter], fill=255)
+        self._coverage = to_coverage(mask)
         self.position = (int(self.center[0] - self.diameter // 2), int(self.center[1] - self.diameter // 2))
 
     def mutate(self):
-        self.diameter = max(self.MIN_DIAMETER, int(self.diameter * random.uniform(0.8, 1.2)))
-        self.center = (self.center[0] + random.randint(-10, 10), self.center[1] + random.randint(-10, 10))
+        self.diameter = max(self.MIN_DIAMETER, int(self.diameter * (1 + self.jitter(0.2))))
+        self.center = (self.center[0] + round(self.jitter(10)), self.center[1] + round(self.jitter(10)))
         self.apply_transformations()
 
+    def genome_key(self):
+        return (type(self).__name__, self.diameter, self.center, self.color)
+
     def reproduce(self):
         child = deepcopy(self)
         child.children_count = 0
-        child.genealogy = self.genealogy + [self.children_count]
+        child.lineage_id = self.lineage.add(self.lineage_id, self.children_count)
         self.children_count += 1
         child.mutate()
         return child
 
-    def recolor_to_region(self, region_img: Image.Image):
-        mean_color = tuple(map(int, ImageStat.Stat(region_img.convert("RGB")).mean))
-        draw = ImageDraw.Draw(self._image)
-        draw.ellipse([0, 0, self.diameter, self.diameter], fill=(*mean_color, 255))
-
     def __str__(self):
         return f"CircleIndividual(name={self.name}, diameter={self.diameter}, position={self.position}\nGenealogy={self.genealogy})"
@@ -0,0 +1,105 @@
+from PIL import Image
+import numpy as np
+from typing import Optional, Tuple
+
+box = Tuple[int, int, int, int]
+
+# Phenotype planes are stored as uint8 in [0, 255], a quarter of the RGBA image they replace,
+# and only widened to float32 for the clipped region at composite time
+TO_UNIT = np.float32(1.0 / 255.0)
+
+
+def to_coverage(mask: Image.Image) -> np.ndarray:
+    """
+    Converts a single-channel ("L") mask to a uint8 (H, W) coverage array (255 = opaque).
+    """
+    return np.asarray(mask, dtype=np.uint8)
+
+
+def to_image(coverage: np.ndarray, shade: np.ndarray, color: Tuple[int, int, int]) -> Image.Image:
+    """
+    Renders a coverage/shade/color phenotype as a straight-alpha RGBA PIL image.
+    """
+    coverage, shade = coverage.astype(np.float32), shade.astype(np.float32)
+    lum = np.divide(shade, coverage, out=np.zeros_like(coverage), where=coverage > 0)
+    rgba = np.empty(coverage.shape + (4,), dtype=np.float32)
+    rgba[..., :3] = lum[..., None] * np.asarray(color, dtype=np.float32)
+    rgba[..., 3] = coverage
+    return Image.fromarray(np.clip(rgba + 0.5, 0, 255).astype(np.uint8))
+
+
+def clip_to_canvas(position: Tuple[int, int], size: Tuple[int, int], canvas_size: Tuple[int, int]) -> Optional[box]:
+    """
+    Returns the (x1, y1, x2, y2) part of a size-d sprite at position that lies on the canvas,
+    or None if it is completely off-canvas.
+    """
+    x, y = position
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(canvas_size[0], x + size[0]), min(canvas_size[1], y + size[1])
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return (x1, y1, x2, y2)
+
+
+def composite(dst: np.ndarray,
+              coverage: np.ndarray,
+              shade: np.ndarray,
+              color: Tuple[int, int, int],
+              position: Tuple[int, int],
+              out: Optional[np.ndarray] = None) -> Optional[box]:
+    """
+    Blends a coverage/shade/color phenotype over dst (float32, (H, W, 3)) with its top-left corner at position.
+
+    Args:
+        dst: Canvas array. Written in place when out is None.
+        coverage: uint8 (h, w) alpha, 255 = opaque.
+        shade: uint8 (h, w) coverage premultiplied by per-pixel luminance, so the premultiplied RGB is
+               shade / 255 * color.
+        color: Flat RGB color, applied only here.
+        position: Top-left corner of the phenotype in canvas coordinates, may be negative.
+        out: Optional scratch buffer at least as large as the clipped region. The blend is written
+             to out[:rh, :rw] and dst is left untouched.
+
+    Returns:
+        The clipped (x1, y1, x2, y2) region that was composited, or None if it is off-canvas.
+    """
+    region = clip_to_canvas(position, (coverage.shape[1], coverage.shape[0]), (dst.shape[1], dst.shape[0]))
+    if region is None:
+        return None
+    x1, y1, x2, y2 = region
+    sx, sy = x1 - position[0], y1 - position[1]
+    rows, cols = slice(sy, sy + (y2 - y1)), slice(sx, sx + (x2 - x1))
+    dst_crop = dst[y1:y2, x1:x2]
+    target = dst_crop if out is None else out[:y2 - y1, :x2 - x1]
+
+    # out = shade * color + dst * (1 - coverage)
+    np.multiply(dst_crop, 1.0 - coverage[rows, cols, None] * TO_UNIT, out=target)
+    target += shade[rows, cols, None] * (np.asarray(color, dtype=np.float32) * TO_UNIT)
+    return region
+
+
+def fitness_gain(canvas: np.ndarray,
+                 target: np.ndarray,
+                 coverage: np.ndarray,
+                 shade: np.ndarray,
+                 color: Tuple[int, int, int],
+                 position: Tuple[int, int],
+                 scratch: np.ndarray) -> float:
+    """
+    Reduction in absolute error against target if the phenotype were composited onto canvas.
+    The blend goes into scratch, so canvas is never modified. Returns -inf when off-canvas.
+    """
+    region = composite(canvas, coverage, shade, color, position, out=scratch)
+    if region is None:
+        return -float('inf')  # Completely off-canvas
+
+    x1, y1, x2, y2 = region
+    before = canvas[y1:y2, x1:x2]
+    after = scratch[:y2 - y1, :x2 - x1]
+    target = target[y1:y2, x1:x2]
+
+    difference_before = np.abs(before - target)
+    difference_after = np.abs(after - target)
+
+    # get sum of differences between before and after
+    return np.sum(difference_before - difference_after)
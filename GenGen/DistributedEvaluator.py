@@ -0,0 +1,109 @@
+import hashlib
+import multiprocessing
+from multiprocessing.connection import Client
+from typing import Sequence, Tuple, Union
+import numpy as np
+
+from .AbstractIndividual import AbstractIndividual
+from .Canvas import Canvas
+from .EvaluationWorker import resolve_authkey, serve
+
+address = Union[str, Tuple[str, int]]
+
+
+class DistributedEvaluator:
+    """
+    Coordinator side of remote evaluation. Splits each batch of candidates across the connected
+    workers as genomes, which the workers render and score. Workers only receive the target and
+    each sprite once (and not at all if they already cached them) and afterwards just the canvas
+    regions touched by each commit.
+    """
+
+    def __init__(self, addresses: Sequence[address], target_image, canvas_size, authkey=None):
+        authkey = resolve_authkey(authkey)
+        target = np.asarray(target_image.convert("RGB"), dtype=np.uint8)
+        digest = hashlib.blake2b(target.tobytes(), digest_size=16).hexdigest()
+        self.canvas_version = 0
+        self.sent_sprites = set()
+        self.connections = []
+        for worker_address in addresses:
+            connection = Client(parse_address(worker_address), authkey=authkey)
+            connection.send(("has_target", digest))
+            if not connection.recv():
+                connection.send(("target", digest, target))
+                connection.recv()
+            connection.send(("canvas", digest, (canvas_size[1], canvas_size[0])))
+            connection.recv()
+            self.connections.append(connection)
+
+    def sync(self, canvas: Canvas) -> None:
+        for x1, y1, x2, y2 in canvas.dirty_rects[self.canvas_version:]:
+            delta = canvas.pixels[y1:y2, x1:x2]
+            for connection in self.connections:
+                connection.send(("delta", x1, y1, delta))
+        self.canvas_version = canvas.version
+
+    def send_sprites(self, individuals: list[AbstractIndividual]) -> None:
+        for individual in individuals:
+            sprite = getattr(individual, "sprite", None)
+            if sprite is None or sprite.key in self.sent_sprites:
+                continue
+            for connection in self.connections:
+                connection.send(("has_sprite", sprite.key))
+                if not connection.recv():
+                    connection.send(("sprite", sprite.key, sprite.image))
+                    connection.recv()
+            self.sent_sprites.add(sprite.key)
+
+    def evaluate(self, individuals: list[AbstractIndividual], canvas: Canvas) -> list[float]:
+        if not self.connections:
+            raise RuntimeError("DistributedEvaluator is closed")
+        self.sync(canvas)
+        self.send_sprites(individuals)
+        genomes = [ind.genome() for ind in individuals]
+
+        # Contiguous chunks, so concatenating the replies restores the batch order
+        chunk = -(-len(genomes) // len(self.connections))
+        busy = []
+        for i, connection in enumerate(self.connections):
+            batch = genomes[i * chunk:(i + 1) * chunk]
+            if batch:
+                connection.send(("evaluate", batch))
+                busy.append(connection)
+
+        fitnesses = []
+        for connection in busy:
+            fitnesses.extend(connection.recv())
+        return fitnesses
+
+    def close(self) -> None:
+        for connection in self.connections:
+            try:
+                connection.send(("close",))
+            except OSError:
+                pass
+            connection.close()
+        self.connections = []
+
+
+def parse_address(worker_address: address) -> Tuple[str, int]:
+    if isinstance(worker_address, str):
+        host, port = worker_address.rsplit(":", 1)
+        return (host, int(port))
+    return tuple(worker_address)
+
+
+def spawn_local_workers(count: int, authkey=None):
+    """
+    Starts count worker processes on localhost, standing in for remote hosts.
+    Returns (addresses, processes); the processes are daemons and die with the coordinator.
+    """
+    authkey = resolve_authkey(authkey)
+    ready = multiprocessing.Queue()
+    processes = []
+    for _ in range(count):
+        process = multiprocessing.Process(target=serve, args=(("localhost", 0), authkey, ready), daemon=True)
+        process.start()
+        processes.append(process)
+    addresses = [ready.get(timeout=30) for _ in processes]
+    return addresses, processes
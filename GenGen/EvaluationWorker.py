@@ -0,0 +1,110 @@
+import argparse
+import os
+from multiprocessing.connection import Listener
+import numpy as np
+
+from .Compositing import fitness_gain
+from .Sprite import Sprite
+
+
+
+def resolve_authkey(authkey=None) -> bytes:
+    """
+    Returns authkey, or GENGEN_AUTHKEY from the environment. Messages are pickled, so anyone holding
+    the key can run code on the worker: there is deliberately no default.
+    """
+    if authkey is None:
+        authkey = os.environ.get("GENGEN_AUTHKEY")
+    if not authkey:
+        raise ValueError("No authkey for evaluation workers: pass one or set GENGEN_AUTHKEY")
+    return authkey.encode() if isinstance(authkey, str) else authkey
+
+
+class EvaluationWorker:
+    """
+    Remote fitness evaluator. Holds a copy of the target and of every sprite (cached by content digest
+    across sessions) and a mirror of the coordinator's canvas that is kept up to date with dirty-rect
+    deltas. Candidates arrive as genomes and are rendered here.
+
+    Protocol (pickled tuples over a multiprocessing.connection):
+        ("has_target", digest)              -> bool
+        ("target", digest, uint8 pixels)     -> None
+        ("canvas", digest, (height, width))  -> None   reset the mirror to a blank canvas
+        ("delta", x1, y1, float32 pixels)    -> no reply
+        ("has_sprite", key)                  -> bool
+        ("sprite", key, RGBA image)          -> None
+        ("evaluate", [(class, attributes), ...]) -> [fitness, ...]   genomes, see AbstractIndividual.genome
+        ("close",)                           -> ends the session
+    """
+
+    def __init__(self):
+        self.targets: dict[str, np.ndarray] = {}
+        self.sprites: dict[str, Sprite] = {}
+        self.target = None
+        self.canvas = None
+        self.scratch = None
+
+    def serve(self, address, authkey=None, ready=None) -> None:
+        with Listener(address, authkey=resolve_authkey(authkey)) as listener:
+            if ready is not None:
+                ready.put(listener.address)
+            while True:
+                with listener.accept() as connection:
+                    self.session(connection)
+
+    def session(self, connection) -> None:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                return
+            kind = message[0]
+            if kind == "close":
+                return
+            elif kind == "has_target":
+                connection.send(message[1] in self.targets)
+            elif kind == "target":
+                _, digest, pixels = message
+                self.targets[digest] = pixels.astype(np.float32)
+                connection.send(None)
+            elif kind == "canvas":
+                _, digest, shape = message
+                self.target = self.targets[digest]
+                self.canvas = np.zeros(shape + (3,), dtype=np.float32)
+                self.scratch = np.empty_like(self.canvas)
+                connection.send(None)
+            elif kind == "delta":
+                _, x1, y1, pixels = message
+                self.canvas[y1:y1 + pixels.shape[0], x1:x1 + pixels.shape[1]] = pixels
+            elif kind == "has_sprite":
+                connection.send(message[1] in self.sprites)
+            elif kind == "sprite":
+                _, key, image = message
+                self.sprites[key] = Sprite(image)
+                connection.send(None)
+            elif kind == "evaluate":
+                connection.send([self.evaluate(cls, attributes) for cls, attributes in message[1]])
+            else:
+                raise ValueError(f"Unknown message: {kind}")
+
+    def evaluate(self, cls, attributes: dict) -> float:
+        individual = cls.from_genome(attributes, self.sprites)
+        return fitness_gain(self.canvas, self.target, individual.coverage, individual.shade,
+                            individual.color, individual.position, self.scratch)
+
+
+def serve(address, authkey=None, ready=None) -> None:
+    EvaluationWorker().serve(address, authkey, ready)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GenGen remote fitness evaluation worker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6000)
+    parser.add_argument("--authkey", default=None, help="Shared secret; defaults to $GENGEN_AUTHKEY")
+    args = parser.parse_args()
+    try:
+        authkey = resolve_authkey(args.authkey)
+    except ValueError as error:
+        parser.error(str(error))
+    serve((args.host, args.port), authkey)
@@ -0,0 +1,61 @@
+from typing import Hashable, Optional, Tuple
+
+box = Tuple[int, int, int, int]
+
+
+class FitnessCache:
+    """
+    Memoizes fitness by genome key. Entries stay valid across canvas commits unless the
+    committed stroke's dirty rectangle intersects the entry's bounding box.
+
+    The cache tracks which canvas version it has seen; sync() replays the dirty rectangles
+    committed since then, so it never has to be told about commits explicitly.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries: dict[Hashable, tuple[float, box]] = {}
+        self.canvas_version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sync(self, canvas) -> None:
+        for rect in canvas.dirty_rects[self.canvas_version:]:
+            self.invalidate(rect)
+        self.canvas_version = canvas.version
+
+    def invalidate(self, rect: box) -> None:
+        x1, y1, x2, y2 = rect
+        stale = [key for key, (_, (bx1, by1, bx2, by2)) in self.entries.items()
+                 if bx1 < x2 and x1 < bx2 and by1 < y2 and y1 < by2]
+        for key in stale:
+            del self.entries[key]
+
+    def get(self, key: Hashable) -> Optional[float]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[float]:
+        # Like get(), but a miss is not counted; for callers that fall back to get() on a miss
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, fitness: float, bbox: box) -> None:
+        if len(self.entries) >= self.max_entries:
+            # Dicts keep insertion order, so this evicts the oldest entry
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (fitness, bbox)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
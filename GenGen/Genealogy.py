@@ -0,0 +1,45 @@
+from array import array
+from typing import Iterable, List
+
+ROOT = -1
+
+
+class Genealogy:
+    """
+    Shared arena of lineage records. Each record stores the id of its parent record and the
+    child index it was born with, so an individual only carries a single integer id and its
+    full genealogy path is rebuilt on demand by walking the parents.
+
+    The arena is shared by every clone of an individual: deepcopy returns the same instance.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.parents = array('i')
+        self.child_indices = array('i')
+
+    def __len__(self):
+        return len(self.parents)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def add(self, parent_id: int, child_index: int) -> int:
+        if not self.enabled:
+            return ROOT
+        self.parents.append(parent_id)
+        self.child_indices.append(child_index)
+        return len(self.parents) - 1
+
+    def add_path(self, path: Iterable[int], parent_id: int = ROOT) -> int:
+        for child_index in path:
+            parent_id = self.add(parent_id, child_index)
+        return parent_id
+
+    def path(self, node_id: int) -> List[int]:
+        path = []
+        while node_id != ROOT:
+            path.append(self.child_indices[node_id])
+            node_id = self.parents[node_id]
+        path.reverse()
+        return path
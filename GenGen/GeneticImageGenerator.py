@@ -1,10 +1,18 @@
 import os
+import time
+import asyncio
 import numpy as np
 import matplotlib.pyplot as plt
 from PIL import Image
 from .Canvas import Canvas
 from .Tournament import Tournament
+from .Genealogy import Genealogy
+from .StrokeEvent import StrokeEvent
+from .BudgetScheduler import BudgetScheduler
+from .DistributedEvaluator import DistributedEvaluator
+from .TargetCache import TargetCache, cached
 from copy import deepcopy
+from typing import AsyncIterator, Iterator, Optional
 
 
 class GeneticImageGenerator:
@@ -16,25 +24,68 @@ class GeneticImageGenerator:
                  enable_display=True,
                  save_timelapse=True,
                  output_name="generated_image",
-                 output_dir="./"):
+                 output_dir="./",
+                 track_genealogy=True,
+                 adaptive_mutation=False,
+                 cache_fitness=True,
+                 time_budget=None,
+                 workers=None,
+                 worker_authkey=None,
+                 prune_strokes=False,
+                 screening_fraction=None,
+                 region_matched_seeding=False,
+                 orientation_seeding=False,
+                 target_cache_dir=None):
         self.population = population
         self.generations = generations
         self.tournament_size = tournament_size
+        self.prune_strokes = prune_strokes
         self.enable_display = enable_display
         self.save_timelapse = save_timelapse
         self.output_name = output_name
         self.output_dir = output_dir
 
-        self.target_image = Image.open(target_image_path).convert("RGB")
+        # One lineage arena for the whole run. With track_genealogy=False nothing is recorded.
+        self.lineage = Genealogy(enabled=track_genealogy)
+        for ind in self.population:
+            ind.lineage_id = self.lineage.add_path(ind.genealogy)
+            ind.lineage = self.lineage
+
+        # With target_cache_dir, the decoded target and everything derived from it is memory-mapped from disk
+        self.target_cache = TargetCache(target_image_path, target_cache_dir) if target_cache_dir is not None else None
+        target_rgb = cached(self.target_cache, "target_rgb",
+                            lambda: np.asarray(Image.open(target_image_path).convert("RGB")))
+        self.target_image = Image.fromarray(np.asarray(target_rgb))
         self.canvas_size = self.target_image.size
-        self.target_image = self.target_image.resize(self.canvas_size)
-        self.canvas = Canvas(self.canvas_size, self.target_image)
+        self.canvas = Canvas(self.canvas_size, self.target_image, record_strokes=prune_strokes)
+
+        # Remote evaluation workers, as "host:port" strings or (host, port) tuples.
+        # worker_authkey defaults to $GENGEN_AUTHKEY and must match the workers'.
+        self.evaluator = DistributedEvaluator(workers, self.target_image, self.canvas_size, worker_authkey) if workers else None
 
         self.tournament = Tournament(
             base_population=self.population,
             target_image=self.target_image,
             canvas=self.canvas,
+            adaptive_mutation=adaptive_mutation,
+            cache_fitness=cache_fitness,
+            evaluator=self.evaluator,
+            screening_fraction=screening_fraction,
+            region_matched_seeding=region_matched_seeding,
+            orientation_seeding=orientation_seeding,
+            target_cache=self.target_cache,
         )
+        self.committed_strokes = 0
+        self.total_gain = 0.0
+        self.evaluations_to_best = 0
+        self.generations_to_best = 0
+        self.cancelled = False
+
+        # With a time budget (seconds), tournament_size is only an upper bound and each tournament's
+        # population size and generations are chosen by the scheduler
+        self.scheduler = BudgetScheduler(time_budget, generations, tournament_size) if time_budget is not None else None
+        # Set once the population is used up or resized; run_tournament() reseeds it once, at its final size
+        self.population_spent = False
 
         # Create output directory for this run
         self.run_output_dir = os.path.join(output_dir, output_name)
@@ -54,35 +105,165 @@ class GeneticImageGenerator:
             plt.title("Evolution Progress")
             plt.axis("off")
 
-        for t in range(self.tournament_size):
-            print(f"\n=== Tournament {t + 1}/{self.tournament_size} ===")
-            best = None
-            for _ in range(self.generations):
-                best = self.tournament.step()
-            best = deepcopy(best)
+        for _ in self.strokes():
+            if self.enable_display:
+                image_display.set_data(np.array(self.canvas.image))
+                plt.draw()
+                plt.pause(0.001)
 
-            fitness = self.tournament.compute_fitness(best)
-            print(f"Best individual: {best}\nFitness: {fitness}")
+        if self.enable_display:
+            plt.ioff()
+            plt.show()
+
+    def cancel(self):
+        # Cooperative: the running tournament finishes, then strokes()/astrokes() stop
+        self.cancelled = True
 
-            if fitness > 1:
-                self.canvas.apply_individual(best)
+    def strokes(self) -> Iterator[StrokeEvent]:
+        """
+        Runs the tournaments one by one and yields a StrokeEvent for every committed stroke.
+        Stopping the iteration early (break, close() or cancel()) still saves the final image.
+        """
+        self.cancelled = False
+        if self.scheduler is not None:
+            self.scheduler.start()
+        try:
+            for t in range(self.tournament_size):
+                if not self.should_continue():
+                    break
+                stroke = self.run_tournament(t)
+                if stroke is not None:
+                    yield stroke
+        finally:
+            self.finish()
 
-                if self.enable_display:
-                    image_display.set_data(np.array(self.canvas.image))
-                    plt.draw()
-                    plt.pause(0.001)
+    async def astrokes(self) -> AsyncIterator[StrokeEvent]:
+        """
+        Async counterpart of strokes(). Each tournament runs in a worker thread so the event loop
+        stays responsive; cancelling the consuming task stops the run between tournaments. The stroke
+        of the tournament that was running when the task got cancelled is still yielded, and the
+        CancelledError is raised on the next iteration.
+        """
+        self.cancelled = False
+        if self.scheduler is not None:
+            self.scheduler.start()
+        try:
+            for t in range(self.tournament_size):
+                if not self.should_continue():
+                    break
+                running = asyncio.ensure_future(asyncio.to_thread(self.run_tournament, t))
+                try:
+                    stroke = await asyncio.shield(running)
+                except asyncio.CancelledError:
+                    # The worker thread cannot be interrupted; let the current tournament land, hand over
+                    # its stroke so the events match the saved image, then honour the cancellation
+                    stroke = await running
+                    if stroke is not None:
+                        yield stroke
+                    raise
+                if stroke is not None:
+                    yield stroke
+        finally:
+            self.finish()
 
-                if self.save_timelapse:
-                    frame_path = os.path.join(self.timelapse_dir, f"frame_{t + 1:04d}.png")
-                    self.canvas.image.save(frame_path)
-            else:
-                print("No valid individual found.")
-                t -= 1
+    def should_continue(self) -> bool:
+        if self.cancelled:
+            return False
+        if self.scheduler is None:
+            return True
+        if not self.scheduler.fits():
+            return False
 
+        population_scale, self.generations = self.scheduler.plan()
+        if population_scale != self.tournament.population_scale:
+            self.tournament.population_scale = population_scale
+            self.population_spent = True
+        return True
+
+    def run_tournament(self, t: int) -> Optional[StrokeEvent]:
+        print(f"\n=== Tournament {t + 1}/{self.tournament_size} ===")
+        start = time.perf_counter()
+        if self.population_spent:
             self.tournament.reinitialise()
+            self.population_spent = False
+        if self.scheduler is not None:
+            print(f"Budget: {self.scheduler.remaining():.1f}s left, "
+                  f"population={len(self.tournament.population)}, generations={self.generations}")
+        evaluations_before = self.tournament.evaluations
+        best = None
+        for _ in range(self.generations):
+            best = self.tournament.step()
+        best = deepcopy(best)
+
+        fitness = self.tournament.compute_fitness(best)
+        print(f"Best individual: {best}\nFitness: {fitness}")
 
+        stroke = None
+        if fitness > 1:
+            self.canvas.apply_individual(best)
+            self.committed_strokes += 1
+            self.total_gain += fitness
+            self.evaluations_to_best += self.tournament.evaluations_to_best
+            self.generations_to_best += self.tournament.generations_to_best
+
+            frame_path = None
+            if self.save_timelapse:
+                frame_path = os.path.join(self.timelapse_dir, f"frame_{t + 1:04d}.png")
+                self.canvas.image.save(frame_path)
+
+            stroke = StrokeEvent(
+                tournament=t,
+                individual=best,
+                fitness=fitness,
+                canvas_version=self.canvas.version,
+                region=self.canvas.dirty_rects[-1],
+                patch=self.canvas.snapshot(self.canvas.dirty_rects[-1]),
+                frame_path=frame_path,
+                evaluations=self.tournament.evaluations - evaluations_before,
+                elapsed=time.perf_counter() - start,
+            )
+        else:
+            print("No valid individual found.")
+
+        if self.scheduler is not None:
+            gain = fitness if stroke is not None else 0.0
+            self.scheduler.record(self.tournament.evaluations - evaluations_before, gain, time.perf_counter() - start)
+
+        self.population_spent = True
+        return stroke
+
+    def finish(self):
+        if self.evaluator is not None:
+            # The workers are released with the run; anything scored afterwards is scored locally
+            self.evaluator.close()
+            self.evaluator = self.tournament.evaluator = None
+        if self.prune_strokes:
+            report = self.canvas.prune(self.tournament.target_pixels)
+            print(f"\nPruned {report['strokes_before'] - report['strokes_after']} of {report['strokes_before']} strokes "
+                  f"({report['occluded']} occluded, {report['net_zero']} net-zero). "
+                  f"Pixel error: {report['error_before']:.0f} before, {report['error_after']:.0f} after")
         self.canvas.image.save(self.final_image_path)
+        self.print_summary()
 
-        if self.enable_display:
-            plt.ioff()
-            plt.show()
+    def print_summary(self):
+        evaluations = self.tournament.evaluations
+        per_stroke = evaluations / self.committed_strokes if self.committed_strokes else float('inf')
+        mode = "adaptive" if self.tournament.adaptive_mutation else "fixed"
+        print(f"\n=== Summary ({mode} mutation) ===")
+        print(f"Committed strokes: {self.committed_strokes}/{self.tournament_size}")
+        print(f"Fitness evaluations: {evaluations} ({per_stroke:.1f} per committed stroke)")
+        print(f"Evaluations until the committed best was found: {self.evaluations_to_best / max(1, self.committed_strokes):.1f} per stroke "
+              f"({self.generations_to_best / max(1, self.committed_strokes):.2f} generations)")
+        if self.tournament.fitness_cache is not None:
+            cache = self.tournament.fitness_cache
+            print(f"Fitness cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate():.1%} hit rate)")
+        if self.tournament.proxy is not None:
+            correlations = self.tournament.rank_correlations
+            mean_correlation = f"{np.mean(correlations):.2f}" if correlations else "n/a"
+            print(f"Screening: {self.tournament.screened_out} exact evaluations saved, "
+                  f"proxy rank correlation {mean_correlation} over {len(correlations)} audits")
+        if self.scheduler is not None:
+            print(f"Time budget: {self.scheduler.time_budget - self.scheduler.remaining():.1f}s "
+                  f"of {self.scheduler.time_budget:.1f}s used, "
+                  f"{self.scheduler.evaluations_per_second or 0:.0f} evaluations/s")
+        print(f"Total fitness gain: {self.total_gain:.0f} ({self.total_gain / max(1, evaluations):.2f} per evaluation)")
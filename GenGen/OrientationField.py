@@ -0,0 +1,84 @@
+import math
+import numpy as np
+from typing import Tuple
+
+from .TargetCache import cached, target_luminance
+
+MIN_ENERGY = 1e-3  # Gradient energy below which structure is treated as noise
+
+
+def box_mean(plane: np.ndarray, radius: int) -> np.ndarray:
+    """
+    Mean over a (2 * radius + 1)-pixel square around every pixel, clipped at the image edges.
+    """
+    height, width = plane.shape
+    table = np.zeros((height + 1, width + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(plane, axis=0, dtype=np.float64), axis=1, out=table[1:, 1:])
+    y1 = np.clip(np.arange(height) - radius, 0, height)[:, None]
+    y2 = np.clip(np.arange(height) + radius + 1, 0, height)[:, None]
+    x1 = np.clip(np.arange(width) - radius, 0, width)[None, :]
+    x2 = np.clip(np.arange(width) + radius + 1, 0, width)[None, :]
+    total = table[y2, x2] - table[y1, x2] - table[y2, x1] + table[y1, x1]
+    return (total / ((y2 - y1) * (x2 - x1))).astype(np.float32)
+
+
+def orientation_field(luminance: np.ndarray, radius: int, min_energy: float = MIN_ENERGY) -> np.ndarray:
+    """
+    Smoothed structure tensor of luminance.
+
+    Returns:
+        float32 (2, H, W): the direction of local structure (along edges, perpendicular to the
+        gradient) in degrees within [0, 180), image coordinates with y down; and a confidence in
+        [0, 1], the tensor's coherence damped where the gradient energy is too low to mean anything.
+    """
+    gy, gx = np.gradient(luminance.astype(np.float32))
+    jxx, jyy, jxy = box_mean(gx * gx, radius), box_mean(gy * gy, radius), box_mean(gx * gy, radius)
+    gradient_angle = 0.5 * np.arctan2(2 * jxy, jxx - jyy)
+    direction = np.degrees(gradient_angle + math.pi / 2) % 180
+    energy = jxx + jyy
+    coherence = np.sqrt(np.square(jxx - jyy) + 4 * np.square(jxy)) / (energy + 1e-12)
+    confidence = coherence * energy / (energy + min_energy)
+    return np.stack([direction, confidence]).astype(np.float32)
+
+
+class OrientationField:
+    """
+    Per-pixel direction of the target's local structure, computed once per target from a smoothed
+    structure tensor over a window about the size of a typical individual.
+
+    Elongated individuals read it to start, and sometimes re-align, with their long side along
+    the edges under them instead of at a uniformly random angle. Shared by every clone:
+    deepcopy returns the same instance.
+    """
+
+    def __init__(self, target_pixels: np.ndarray, window: int, target_cache=None):
+        self.radius = max(1, window // 2)
+        luminance = target_luminance(target_pixels, target_cache)
+        self.field = cached(target_cache, "orientation_field", lambda: orientation_field(luminance, self.radius),
+                            parameters=(self.radius, MIN_ENERGY))
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def sample(self, center: Tuple[int, int]) -> Tuple[float, float]:
+        """
+        Returns:
+            (structure direction in degrees, confidence in [0, 1]) at the pixel nearest center.
+        """
+        height, width = self.field.shape[1:]
+        x = min(max(int(center[0]), 0), width - 1)
+        y = min(max(int(center[1]), 0), height - 1)
+        return float(self.field[0, y, x]), float(self.field[1, y, x])
+
+    def rotation(self, center: Tuple[int, int], long_side_horizontal: bool = True) -> Tuple[float, float]:
+        """
+        Rotation, in PIL's counter-clockwise degrees, that lays the long side of an unrotated shape
+        along the structure at center.
+
+        Returns:
+            (rotation, confidence)
+        """
+        direction, confidence = self.sample(center)
+        # PIL rotates counter-clockwise on screen, while directions are measured with y pointing down
+        rotation = -direction if long_side_horizontal else 90 - direction
+        return rotation % 180, confidence
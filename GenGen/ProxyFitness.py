@@ -0,0 +1,75 @@
+import math
+import numpy as np
+
+from .AbstractIndividual import AbstractIndividual
+from .Canvas import Canvas
+from .Compositing import clip_to_canvas
+from .TargetCache import cached
+
+MEAN_ABS_DEVIATION = math.sqrt(2 / math.pi)  # E|X - mu| / sigma for a normal distribution
+
+
+class ProxyFitness:
+    """
+    Cheap O(1)-per-bbox estimate of fitness from summed-area tables.
+
+    The target's per-channel sums and squared sums are tabulated once, the current canvas error
+    once per canvas version. A candidate's gain is then estimated as its mean coverage times the
+    current error in its bbox minus the error a flat patch of its painted color would leave there,
+    assuming normally distributed target pixels around the bbox mean.
+    """
+
+    def __init__(self, target_pixels: np.ndarray, target_cache=None):
+        self.target_pixels = target_pixels
+        self.target_sat = cached(target_cache, "target_sat", lambda: summed_area_table(target_pixels))
+        self.target_sq_sat = cached(target_cache, "target_sq_sat",
+                                    lambda: summed_area_table(np.square(target_pixels, dtype=np.float64)))
+        self.error_sat = None
+        self.canvas_version = -1
+
+    def sync(self, canvas: Canvas) -> None:
+        if canvas.version != self.canvas_version:
+            error = np.abs(canvas.pixels - self.target_pixels).sum(axis=2, keepdims=True)
+            self.error_sat = summed_area_table(error)
+            self.canvas_version = canvas.version
+
+    def estimate(self, individual: AbstractIndividual) -> float:
+        coverage = individual.coverage
+        region = clip_to_canvas(individual.position, (coverage.shape[1], coverage.shape[0]),
+                                (self.target_pixels.shape[1], self.target_pixels.shape[0]))
+        if region is None:
+            return -float('inf')
+        coverage_sum = coverage.sum()
+        if coverage_sum <= 0:
+            return 0.0
+
+        area = (region[2] - region[0]) * (region[3] - region[1])
+        current_error = box_sum(self.error_sat, region)[0]
+        mean = box_sum(self.target_sat, region) / area
+        variance = np.maximum(box_sum(self.target_sq_sat, region) / area - mean * mean, 0.0)
+
+        painted = np.asarray(individual.color, dtype=np.float64) * (individual.shade.sum() / coverage_sum)
+        patch_error = area * MEAN_ABS_DEVIATION * np.sqrt(variance + np.square(mean - painted)).sum()
+        return float(coverage_sum / (255.0 * coverage.size) * (current_error - patch_error))
+
+
+def summed_area_table(values: np.ndarray) -> np.ndarray:
+    table = np.zeros((values.shape[0] + 1, values.shape[1] + 1, values.shape[2]), dtype=np.float64)
+    np.cumsum(np.cumsum(values, axis=0, dtype=np.float64), axis=1, out=table[1:, 1:])
+    return table
+
+
+def box_sum(table: np.ndarray, region) -> np.ndarray:
+    x1, y1, x2, y2 = region
+    return table[y2, x2] - table[y1, x2] - table[y2, x1] + table[y1, x1]
+
+
+def rank_correlation(a, b) -> float:
+    """
+    Spearman rank correlation (ties broken by order).
+    """
+    ranks_a = np.argsort(np.argsort(np.asarray(a, dtype=np.float64)))
+    ranks_b = np.argsort(np.argsort(np.asarray(b, dtype=np.float64)))
+    if len(ranks_a) < 2:
+        return 1.0
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
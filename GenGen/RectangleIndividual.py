@@ -1,4 +1,4 @@
-from PIL import Image, ImageDraw, ImageStat
+from PIL import Image, ImageDraw
 import random
 from typing import Optional, Tuple
 from copy import deepcopy
@@ -7,6 +7,7 @@ import numpy as np
 
 
 from .AbstractIndividual import AbstractIndividual
+from .Compositing import to_coverage
 
 
 class RectangleIndividual(AbstractIndividual):
@@ -15,7 +16,6 @@ class RectangleIndividual(AbstractIndividual):
         self.width: int    
         self.height: int
         self.rotation: float
-        self._image = None
         super().__init__(**kwargs)
 
     def get_position(self):
@@ -24,14 +24,6 @@ class RectangleIndividual(AbstractIndividual):
     def get_canvas_size(self):
         return self.canvas_size
 
-    @property
-    def image(self):
-        return self._image
-
-    def get_transformed_bbox(self):
-        x, y = self.position
-        return (x, y, x + self.image.width, y + self.image.height)
-
     def reset_attributes(self, canvas_size):
         self.canvas_size = canvas_size
         self.center = (random.randint(0, canvas_size[0]), random.randint(0, canvas_size[1]))
@@ -54,7 +46,7 @@ class RectangleIndividual(AbstractIndividual):
         max_pourcentage = 0.1
         max_surface = max_pourcentage * canvas_area
         min_surface = min_pourcentage * canvas_area
-        surface = random.randint(min_surface, max_surface)
+        surface = random.randint(int(min_surface), int(max_surface))
         
         
         
@@ -84,34 +76,35 @@ class RectangleIndividual(AbstractIndividual):
             return int(round(w)), int(round(h))
         
         self.width, self.height = enforce_min_side_preserve_area(float_width, float_height, self.MIN_SIDE)
-        
+        aligned = self.aligned_rotation(self.width >= self.height)
+        if aligned is not None:
+            self.rotation = aligned
+
         self.apply_transformations()
 
     def apply_transformations(self):
-        base = Image.new("RGBA", (self.width, self.height), (255, 255, 255, 255))
-        self._image = base.rotate(self.rotation, expand=True)
-        self.position = (int(self.center[0] - self._image.width // 2), int(self.center[1] - self._image.height // 2))
+        mask = Image.new("L", (self.width, self.height), 255).rotate(self.rotation, expand=True)
+        self._coverage = to_coverage(mask)
+        self.position = (int(self.center[0] - mask.width // 2), int(self.center[1] - mask.height // 2))
 
     def mutate(self):
-        self.rotation += random.uniform(-30, 30)
-        self.width = max(self.MIN_SIDE, int(self.width * random.uniform(0.8, 1.2)))
-        self.height = max(self.MIN_SIDE, int(self.height * random.uniform(0.8, 1.2)))
-        self.center = (self.center[0] + random.randint(-10, 10), self.center[1] + random.randint(-10, 10))
+        self.rotation = self.mutate_rotation(self.rotation, 30, self.width >= self.height)
+        self.width = max(self.MIN_SIDE, int(self.width * (1 + self.jitter(0.2))))
+        self.height = max(self.MIN_SIDE, int(self.height * (1 + self.jitter(0.2))))
+        self.center = (self.center[0] + round(self.jitter(10)), self.center[1] + round(self.jitter(10)))
         self.apply_transformations()
 
+    def genome_key(self):
+        return (type(self).__name__, self.width, self.height, self.rotation, self.center, self.color)
+
     def reproduce(self):
         child = deepcopy(self)
         child.children_count = 0
-        child.genealogy = self.genealogy + [self.children_count]
+        child.lineage_id = self.lineage.add(self.lineage_id, self.children_count)
         self.children_count += 1
         child.mutate()
         return child
 
-    def recolor_to_region(self, region_img: Image.Image):
-        mean_color = tuple(map(int, ImageStat.Stat(region_img.convert("RGB")).mean))
-        base = Image.new("RGBA", (self.width, self.height), (*mean_color, 255))
-        self._image = base.rotate(self.rotation, expand=True)
-
     def __str__(self):
         return f"RectangleIndividual(name={self.name}, size=({self.width}, {self.height}), rotation={self.rotation:.2f}, position={self.position}\nGenealogy={self.genealogy})"
     
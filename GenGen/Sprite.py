@@ -0,0 +1,64 @@
+from PIL import Image, ImageChops
+import hashlib
+from typing import Tuple, Union
+import numpy as np
+
+from .Compositing import to_coverage
+
+
+class Sprite:
+    """
+    A source image preprocessed once into a mip pyramid of the two planes individuals need:
+    alpha and grayscale premultiplied by alpha. Shading is linear in those premultiplied planes,
+    so they can be resampled independently without dark fringes at transparent edges.
+
+    Shared by every clone of a CustomImageIndividual: deepcopy returns the same instance.
+    """
+    MIN_LEVEL_SIDE = 16
+
+    def __init__(self, image: Union[str, Image.Image]):
+        if isinstance(image, str):
+            image = Image.open(image)
+        self.image = image.convert("RGBA")
+        self.size = self.image.size
+        # Content digest so clones of the same sprite share fitness cache entries. Size and mode are
+        # part of it, since the same bytes can lay out different images.
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{self.image.mode}:{self.image.width}x{self.image.height}:".encode())
+        digest.update(self.image.tobytes())
+        self.key = digest.hexdigest()
+
+        alpha = self.image.getchannel("A")
+        premultiplied_gray = ImageChops.multiply(self.image.convert("L"), alpha)
+        self.levels = [(alpha, premultiplied_gray)]
+        while min(alpha.size) >= 2 * self.MIN_LEVEL_SIDE:
+            alpha, premultiplied_gray = alpha.reduce(2), premultiplied_gray.reduce(2)
+            self.levels.append((alpha, premultiplied_gray))
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def level_for(self, size: Tuple[int, int]) -> Tuple[Image.Image, Image.Image]:
+        """
+        Returns the smallest level that is still at least size, so resampling only ever shrinks.
+        """
+        for alpha, premultiplied_gray in reversed(self.levels):
+            if alpha.width >= size[0] and alpha.height >= size[1]:
+                return alpha, premultiplied_gray
+        return self.levels[0]
+
+    def transform(self, size: Tuple[int, int], rotation: float, with_gray: bool = True):
+        """
+        Resizes and rotates from the nearest mip level.
+
+        Returns:
+            (coverage, premultiplied gray or None) as uint8 arrays, 255 = opaque / white.
+        """
+        alpha, premultiplied_gray = self.level_for(size)
+        coverage = to_coverage(
+            alpha.resize(size, Image.Resampling.BICUBIC).rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC))
+        if not with_gray:
+            return coverage, None
+        gray = to_coverage(
+            premultiplied_gray.resize(size, Image.Resampling.BICUBIC).rotate(rotation, expand=True, resample=Image.Resampling.BICUBIC))
+        return coverage, np.minimum(gray, coverage)
@@ -0,0 +1,96 @@
+import random
+import numpy as np
+from typing import List, Tuple
+
+from .CustomImageIndividual import CustomImageIndividual
+from .TargetCache import target_luminance
+
+HISTOGRAM_BINS = 9  # Odd, so a flat region (relative luminance 1) falls mid-bin
+
+
+def describe(luminance: np.ndarray, weight: np.ndarray, elongation: float, structure: np.ndarray = None) -> np.ndarray:
+    """
+    Compact descriptor: contrast histogram (luminance relative to its weighted mean, so it does not
+    depend on the tint), edge density and structure-tensor coherence of the structure plane
+    (luminance by default), and elongation. Everything but the histogram is rotation invariant,
+    since seeded individuals still draw a random rotation.
+    """
+    total = weight.sum()
+    if total <= 0:
+        return np.zeros(HISTOGRAM_BINS + 3, dtype=np.float32)
+    mean = max(float((luminance * weight).sum() / total), 1e-3)
+    histogram = np.histogram(luminance / mean, bins=HISTOGRAM_BINS, range=(0, 2), weights=weight)[0] / total
+
+    gy, gx = np.gradient((luminance if structure is None else structure) / mean)
+    jxx, jyy, jxy = (gx * gx).sum(), (gy * gy).sum(), (gx * gy).sum()
+    coherence = np.sqrt((jxx - jyy) ** 2 + 4 * jxy ** 2) / (jxx + jyy + 1e-6)
+    edge_density = np.sqrt(gx * gx + gy * gy).mean()
+    return np.concatenate([histogram, [edge_density, coherence, elongation]]).astype(np.float32)
+
+
+class SpriteIndex:
+    """
+    Nearest-neighbour index over a sprite library. Each CustomImageIndividual in the base population
+    is described once, from the mip level closest to patch_side, the way it renders with its
+    recoloring method. A brute-force search over an (N, D) matrix is plenty for hundreds of sprites.
+
+    The target never changes, so its regions are described once on a grid with half-patch stride and
+    each cell keeps its k nearest sprites; seeding a center is then a table lookup. The Tournament only
+    seeds part of the sprite slots this way, so the rest of the library still gets tried.
+    """
+
+    def __init__(self, individuals: List[CustomImageIndividual], target_pixels: np.ndarray, patch_side: int, k: int = 3,
+                 target_cache=None):
+        self.individuals = individuals
+        self.patch_side = max(4, patch_side)
+        self.k = k
+        self.target_luminance = target_luminance(target_pixels, target_cache)
+        self.descriptors = np.stack([self.describe_individual(ind) for ind in individuals])
+
+        height, width = self.target_luminance.shape
+        self.stride = max(1, self.patch_side // 2)
+        self.cells = [
+            [self.query(self.describe_region((x + self.stride // 2, y + self.stride // 2)), k)
+             for x in range(0, width, self.stride)]
+            for y in range(0, height, self.stride)
+        ]
+
+    def __len__(self):
+        return len(self.individuals)
+
+    def describe_individual(self, individual: CustomImageIndividual) -> np.ndarray:
+        alpha, premultiplied_gray = individual.sprite.level_for((self.patch_side, self.patch_side))
+        coverage = np.asarray(alpha, dtype=np.float32) / 255.0
+        gray = np.asarray(premultiplied_gray, dtype=np.float32) / 255.0
+        if individual.recoloring_method == 'overwrite':
+            shade = coverage
+        else:
+            shade = gray * (1.0 - individual.min_impact) + coverage * individual.min_impact
+        brightness = np.divide(shade, coverage, out=np.zeros_like(coverage), where=coverage > 0)
+        width, height = individual.sprite.size
+        elongation = 1.0 - min(width, height) / max(width, height)
+        # Gradients of the shade plane, padded with transparency, include the silhouette that lands on the canvas
+        return describe(brightness, coverage, elongation, structure=np.pad(shade, 1))
+
+    def describe_region(self, center: Tuple[int, int]) -> np.ndarray:
+        height, width = self.target_luminance.shape
+        half = self.patch_side // 2
+        x1, y1 = max(0, center[0] - half), max(0, center[1] - half)
+        x2, y2 = min(width, center[0] + half + 1), min(height, center[1] + half + 1)
+        patch = self.target_luminance[y1:y2, x1:x2]
+        if patch.shape[0] < 2 or patch.shape[1] < 2:
+            return np.zeros(self.descriptors.shape[1], dtype=np.float32)
+        descriptor = describe(patch, np.ones_like(patch), 0.0)
+        # A coherent target region wants an elongated sprite
+        descriptor[-1] = descriptor[-2]
+        return descriptor
+
+    def query(self, descriptor: np.ndarray, k: int = 3) -> List[CustomImageIndividual]:
+        distances = np.square(self.descriptors - descriptor).sum(axis=1)
+        nearest = np.argsort(distances)[:k]
+        return [self.individuals[i] for i in nearest]
+
+    def seed(self, center: Tuple[int, int]) -> CustomImageIndividual:
+        # The user's replication_factor still weighs the nearest matches against each other
+        cell = self.cells[center[1] // self.stride][center[0] // self.stride]
+        return random.choices(cell, weights=[ind.replication_factor for ind in cell])[0]
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+
+from .AbstractIndividual import AbstractIndividual
+
+
+@dataclass
+class StrokeEvent:
+    """
+    One committed stroke, as yielded by GeneticImageGenerator.strokes() and astrokes().
+
+    canvas_version identifies the canvas state right after this stroke. region is the (x1, y1, x2, y2)
+    part of the canvas the stroke touched and patch a uint8 (h, w, 3) copy of those canvas pixels taken
+    at commit time, so pasting the patches in order reproduces the canvas even when the generator has
+    moved on. frame_path points to the saved timelapse frame, if timelapse saving is enabled.
+    """
+    tournament: int
+    individual: AbstractIndividual
+    fitness: float
+    canvas_version: int
+    region: Tuple[int, int, int, int]
+    patch: np.ndarray
+    frame_path: Optional[str]
+    evaluations: int
+    elapsed: float
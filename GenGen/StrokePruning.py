@@ -0,0 +1,88 @@
+import numpy as np
+from typing import List, Tuple
+
+from .Compositing import TO_UNIT, clip_to_canvas, composite
+
+# (coverage, shade, color, position), as recorded by Canvas.apply_individual
+stroke = Tuple[np.ndarray, np.ndarray, Tuple[int, int, int], Tuple[int, int]]
+
+
+def prune_strokes(strokes: List[stroke], target: np.ndarray, visibility_threshold: float = 0.5):
+    """
+    Removes committed strokes that do not contribute to the final image.
+
+    A stroke is occluded when later strokes cover it so completely that removing it changes no
+    pixel by more than visibility_threshold levels, and net-zero when removing it does not increase
+    the absolute error against target. Compositing is affine per pixel, so the effect of removing
+    stroke i on the final image is exactly T_i * (shade_i * color_i - coverage_i * below_i), where
+    below_i is the canvas before stroke i and T_i the transmittance of the kept strokes after it.
+    Strokes are visited from last to first so every decision sees the final state of later strokes.
+
+    Args:
+        strokes: Committed strokes in order.
+        target: float32 (H, W, 3) target pixels.
+        visibility_threshold: Largest per-pixel change, in 0-255 levels, still treated as invisible.
+
+    Returns:
+        (keep flags per stroke, re-rendered float32 canvas pixels, report dict)
+    """
+    height, width = target.shape[:2]
+
+    # Forward replay, remembering what each stroke was painted over
+    pixels = np.zeros((height, width, 3), dtype=np.float32)
+    regions, belows = [], []
+    for coverage, shade, color, position in strokes:
+        region = clip_to_canvas(position, (coverage.shape[1], coverage.shape[0]), (width, height))
+        regions.append(region)
+        if region is None:
+            belows.append(None)
+            continue
+        x1, y1, x2, y2 = region
+        belows.append(pixels[y1:y2, x1:x2].copy())
+        composite(pixels, coverage, shade, color, position)
+
+    error_before = float(np.abs(pixels - target).sum())
+    transmittance = np.ones((height, width), dtype=np.float32)
+    keep = [True] * len(strokes)
+    occluded = net_zero = 0
+
+    for i in range(len(strokes) - 1, -1, -1):
+        coverage, shade, color, position = strokes[i]
+        if regions[i] is None:
+            keep[i] = False
+            occluded += 1
+            continue
+        x1, y1, x2, y2 = regions[i]
+        sx, sy = x1 - position[0], y1 - position[1]
+        rows, cols = slice(sy, sy + (y2 - y1)), slice(sx, sx + (x2 - x1))
+        stroke_coverage = coverage[rows, cols, None] * TO_UNIT
+        painted = shade[rows, cols, None] * (np.asarray(color, dtype=np.float32) * TO_UNIT)
+
+        final = pixels[y1:y2, x1:x2]
+        contribution = transmittance[y1:y2, x1:x2, None] * (painted - stroke_coverage * belows[i])
+
+        if np.abs(contribution).max() < visibility_threshold:
+            occluded += 1
+            keep[i] = False
+        else:
+            target_crop = target[y1:y2, x1:x2]
+            error_with = np.abs(final - target_crop).sum()
+            error_without = np.abs(final - contribution - target_crop).sum()
+            if error_without <= error_with:
+                net_zero += 1
+                keep[i] = False
+
+        if keep[i]:
+            transmittance[y1:y2, x1:x2] *= 1.0 - stroke_coverage[..., 0]
+        else:
+            final -= contribution
+
+    report = {
+        "strokes_before": len(strokes),
+        "strokes_after": sum(keep),
+        "occluded": occluded,
+        "net_zero": net_zero,
+        "error_before": error_before,
+        "error_after": float(np.abs(pixels - target).sum()),
+    }
+    return keep, pixels, report
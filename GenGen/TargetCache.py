@@ -0,0 +1,58 @@
+import hashlib
+import os
+from typing import Callable, Optional
+import numpy as np
+
+
+class TargetCache:
+    """
+    On-disk cache of everything derived from a target image, keyed by a hash of the file's bytes
+    so the image never has to be decoded to find its entry. Arrays are stored as .npy files and
+    loaded memory-mapped (read-only), so a repeated run on the same target starts without
+    re-decoding or re-deriving anything.
+
+    Entries are also keyed by FORMAT_VERSION, to be bumped whenever a derivation changes, and by a
+    digest of the parameters each caller passes, so stale arrays are never served as current.
+    """
+    DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gengen")
+    FORMAT_VERSION = 1
+
+    def __init__(self, target_image_path: str, cache_dir: Optional[str] = None):
+        cache_dir = cache_dir if cache_dir is not None else self.DEFAULT_CACHE_DIR
+        with open(target_image_path, "rb") as f:
+            self.key = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        self.directory = os.path.join(cache_dir, f"v{self.FORMAT_VERSION}", self.key)
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def array(self, name: str, compute: Callable[[], np.ndarray], parameters: tuple = ()) -> np.ndarray:
+        if parameters:
+            name = f"{name}-{hashlib.blake2b(repr(parameters).encode(), digest_size=8).hexdigest()}"
+        path = os.path.join(self.directory, f"{name}.npy")
+        if os.path.exists(path):
+            self.hits += 1
+            return np.load(path, mmap_mode="r")
+
+        self.misses += 1
+        value = np.ascontiguousarray(compute())
+        # Write then rename, so concurrent runs never see a partial file
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, value)
+        os.replace(temporary_path, path)
+        return value
+
+
+def cached(cache: Optional[TargetCache], name: str, compute: Callable[[], np.ndarray], parameters: tuple = ()) -> np.ndarray:
+    return compute() if cache is None else cache.array(name, compute, parameters)
+
+
+LUMINANCE_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def target_luminance(target_pixels: np.ndarray, cache: Optional[TargetCache] = None) -> np.ndarray:
+    # float32 (H, W) luminance in [0, 1], shared by everything that looks at the target's structure
+    return cached(cache, "target_luminance",
+                  lambda: target_pixels @ np.array(LUMINANCE_WEIGHTS, dtype=np.float32) / 255.0,
+                  parameters=LUMINANCE_WEIGHTS)
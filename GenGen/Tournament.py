@@ -1,8 +1,18 @@
 from PIL.Image import Image
+import math
+import random
+from typing import Optional
 import numpy as np
 from copy import deepcopy
-from .AbstractIndividual import AbstractIndividual
+from .AbstractIndividual import AbstractIndividual, adapt_mutation_scale
 from .Canvas import Canvas
+from .Compositing import fitness_gain
+from .FitnessCache import FitnessCache
+from .ProxyFitness import ProxyFitness, rank_correlation
+from .CustomImageIndividual import CustomImageIndividual
+from .SpriteIndex import SpriteIndex
+from .OrientationField import OrientationField
+from .TargetCache import cached
 
 scored_individual = tuple[AbstractIndividual, float]
 
@@ -12,25 +22,91 @@ class Tournament:
                  target_image: Image,
                  canvas: Canvas,
                  mutation_rate=0.1,
-                 elite=True):
+                 elite=True,
+                 adaptive_mutation=False,
+                 cache_fitness=True,
+                 evaluator=None,
+                 screening_fraction=None,
+                 screening_audit_interval=10,
+                 region_matched_seeding=False,
+                 orientation_seeding=False,
+                 target_cache=None):
         self.base_population = base_population
         self.population = []
         self.target_image = target_image
         self.canvas = canvas
         self.mutation_rate = mutation_rate
         self.elite = elite
+        self.adaptive_mutation = adaptive_mutation
+        # Child success rate of every adapted generation, for reporting
+        self.success_rates = []
+        self.evaluations = 0
+        self.fitness_cache = FitnessCache() if cache_fitness else None
+        # Optional DistributedEvaluator; candidates are scored locally when None
+        self.evaluator = evaluator
         self.survivor_ratio = 0.25
+        # Multiplies every replication_factor when seeding; set by the budget scheduler
+        self.population_scale = 1.0
+        self.target_pixels = cached(target_cache, "target_pixels",
+                                    lambda: np.asarray(target_image.convert("RGB"), dtype=np.float32))
+        # Two-stage screening: only the top screening_fraction by proxy fitness gets an exact evaluation.
+        # Every screening_audit_interval generations everything is scored exactly to measure the proxy.
+        self.screening_fraction = screening_fraction
+        self.screening_audit_interval = screening_audit_interval
+        self.proxy = ProxyFitness(self.target_pixels, target_cache) if screening_fraction is not None else None
+        self.screened_generations = 0
+        self.screened_out = 0
+        self.rank_correlations = []
+        # Reusable buffer that candidates are composited into, so fitness never touches the canvas
+        self.scratch = np.empty_like(canvas.pixels)
+        # Region-matched seeding: seeded_fraction of the sprite clones go to sampled centers whose target
+        # region they resemble; the rest are drawn by replication_factor as usual, so every sprite gets tried
+        self.sprite_index = None
+        self.seeded_fraction = 0.5
+        typical_side = int(np.sqrt(canvas.size[0] * canvas.size[1] * 0.025))  # Half the largest initial area
+        sprites = [ind for ind in base_population if isinstance(ind, CustomImageIndividual)]
+        if region_matched_seeding and sprites:
+            self.sprite_index = SpriteIndex(sprites, self.target_pixels, typical_side, target_cache=target_cache)
+        # Orientation seeding: elongated shapes start, and sometimes re-align, along the target's local structure
+        self.orientation_field = OrientationField(self.target_pixels, typical_side, target_cache) if orientation_seeding else None
         self.reinitialise()
 
     def reinitialise(self):
         self.population = []
+        # Evaluations this tournament needed before its best fitness stopped improving
+        self.best_fitness = -float('inf')
+        self.evaluations_at_start = self.evaluations
+        self.evaluations_to_best = 0
+        # Last elite and its exact fitness, which stays valid until the canvas changes at the next commit
+        self.elite_individual = None
+        self.elite_fitness = None
+        self.families = []
+        self.unscored = set()
+        self.mutation_scale = 1.0
+        self.generations = 0
+        self.generations_to_best = 0
+        seeded_slots = 0
         for ind in self.base_population:
-            for _ in range(ind.replication_factor):
+            copies = max(1, round(ind.replication_factor * self.population_scale))
+            if self.sprite_index is not None and isinstance(ind, CustomImageIndividual):
+                seeded = sum(random.random() < self.seeded_fraction for _ in range(copies))
+                seeded_slots += seeded
+                copies -= seeded
+            for _ in range(copies):
                 clone = deepcopy(ind)
+                clone.orientation_field = self.orientation_field
                 clone.reset_attributes(self.canvas.size)
                 self.apply_target_region_color(clone)
                 self.population.append(clone)
 
+        for _ in range(seeded_slots):
+            center = (random.randint(0, self.canvas.size[0] - 1), random.randint(0, self.canvas.size[1] - 1))
+            clone = deepcopy(self.sprite_index.seed(center))
+            clone.orientation_field = self.orientation_field
+            clone.reset_attributes(self.canvas.size, center=center)
+            self.apply_target_region_color(clone)
+            self.population.append(clone)
+
     def apply_target_region_color(self, individual: AbstractIndividual) -> None:
         x1, y1, x2, y2 = individual.get_transformed_bbox()
         x1, y1 = max(0, x1), max(0, y1)
@@ -40,44 +116,122 @@ class Tournament:
             individual.recolor_to_region(region)
 
     def compute_fitness(self, individual: AbstractIndividual) -> float:
-        box = individual.get_transformed_bbox()
-        x1, y1, x2, y2 = map(int, box)
+        return self.compute_fitnesses([individual])[0]
 
-        x1_clamped = max(0, x1)
-        y1_clamped = max(0, y1)
-        x2_clamped = min(self.canvas.size[0], x2)
-        y2_clamped = min(self.canvas.size[1], y2)
+    def compute_fitnesses(self, individuals: list[AbstractIndividual]) -> list[float]:
+        """
+        Scores a batch of individuals, answering from the fitness cache where possible and
+        sending the rest to the evaluator (or scoring them locally) in a single batch.
+        """
+        fitnesses = [None] * len(individuals)
+        keys = [None] * len(individuals)
+        pending = []
+        duplicates = {}  # Genome key -> index of the first pending individual with that key
+        if self.fitness_cache is not None:
+            self.fitness_cache.sync(self.canvas)
+        for i, individual in enumerate(individuals):
+            key = keys[i] = individual.genome_key() if self.fitness_cache is not None else None
+            if key is None:
+                pending.append(i)
+            elif key in duplicates:
+                self.fitness_cache.hits += 1
+            else:
+                fitnesses[i] = self.fitness_cache.get(key)
+                if fitnesses[i] is None:
+                    duplicates[key] = i
+                    pending.append(i)
 
-        if x2_clamped <= x1_clamped or y2_clamped <= y1_clamped:
-            return -float('inf')  # Completely off-canvas
+        scores = self.score_batch([individuals[i] for i in pending])
+        for i, fitness in zip(pending, scores):
+            fitnesses[i] = fitness
+            if keys[i] is not None:
+                self.fitness_cache.put(keys[i], fitness, individuals[i].get_transformed_bbox())
+        for i, key in enumerate(keys):
+            if fitnesses[i] is None:
+                fitnesses[i] = fitnesses[duplicates[key]]
+        return fitnesses
 
-        region = (x1_clamped, y1_clamped, x2_clamped, y2_clamped)
+    def score_batch(self, individuals: list[AbstractIndividual]) -> list[float]:
+        if self.evaluator is not None and individuals:
+            self.evaluations += len(individuals)
+            return self.evaluator.evaluate(individuals, self.canvas)
+        return [self.score(individual) for individual in individuals]
 
-        canvas_crop = self.canvas.image.crop(region)
-        target_crop = self.target_image.crop(region)
+    def score(self, individual: AbstractIndividual) -> float:
+        self.evaluations += 1
+        return fitness_gain(self.canvas.pixels, self.target_pixels, individual.coverage, individual.shade,
+                            individual.color, individual.position, self.scratch)
 
-        temp_crop = canvas_crop.copy()
-        paste_x = x1_clamped - x1
-        paste_y = y1_clamped - y1
-        try:
-            temp_crop.paste(individual.image, (paste_x, paste_y), individual.image.convert("RGBA"))
-        except ValueError:
-            temp_crop.paste(individual.image, (paste_x, paste_y))
+    def evaluate_fitnesses(self):
+        self.unscored = set()
+        if self.proxy is not None:
+            scored = list(zip(self.population, self.screen_fitnesses(self.population)))
+        else:
+            scored = list(zip(self.population, self.compute_fitnesses(self.population)))
+        if self.adaptive_mutation:
+            self.adapt_mutation_scales(scored)
+        return scored
 
-        before = np.asarray(canvas_crop, dtype=np.float32)
-        after = np.asarray(temp_crop, dtype=np.float32)
-        target = np.asarray(target_crop, dtype=np.float32)
+    def adapt_mutation_scales(self, scored) -> None:
+        """
+        1/5th success rule over the whole generation: the step size shrinks when fewer than one child
+        in five beat its parent and grows above that, and every child inherits it. Adapting per child
+        (or per family) would let selection ratchet the scale up, since the children that happened to
+        grow theirs are the ones that survive. Children screened out by the proxy were never scored
+        and do not count.
+        """
+        fitness_of = {id(ind): fitness for i, (ind, fitness) in enumerate(scored) if i not in self.unscored}
+        outcomes = [fitness_of[id(child)] > parent_fitness
+                    for parent_fitness, children in self.families
+                    for child in children if id(child) in fitness_of]
+        if not outcomes:
+            return
+        self.success_rates.append(sum(outcomes) / len(outcomes))
+        self.mutation_scale = adapt_mutation_scale(self.mutation_scale, self.success_rates[-1])
+        for ind, _ in scored:
+            ind.mutation_scale = self.mutation_scale
 
-        difference_before = np.abs(before - target)
-        difference_after = np.abs(after - target)
+    def known_fitness(self, individual: AbstractIndividual) -> Optional[float]:
+        """
+        Exact fitness that costs no evaluation: the elite's, or a fitness cache entry. None otherwise.
+        """
+        if individual is self.elite_individual:
+            return self.elite_fitness
+        key = individual.genome_key() if self.fitness_cache is not None else None
+        return self.fitness_cache.peek(key) if key is not None else None
 
-        # get sum of differences between before and after
-        fitness = np.sum(difference_before - difference_after)
-        return fitness
+    def screen_fitnesses(self, individuals: list[AbstractIndividual]) -> list[float]:
+        """
+        Resolves known fitnesses first, then ranks the rest by proxy fitness and computes the exact
+        fitness of the top fraction only. Those screened out score -inf, so they can neither survive
+        nor be selected, and their indices are left in self.unscored.
+        """
+        self.proxy.sync(self.canvas)
+        if self.fitness_cache is not None:
+            self.fitness_cache.sync(self.canvas)
+        fitnesses = [self.known_fitness(ind) for ind in individuals]
+        misses = [i for i, fitness in enumerate(fitnesses) if fitness is None]
+        estimates = {i: self.proxy.estimate(individuals[i]) for i in misses}
+        self.screened_generations += 1
 
+        if self.screened_generations % self.screening_audit_interval == 0:
+            selected = misses
+        else:
+            # Known fitnesses count towards the survivors; the top fraction of the rest is scored exactly
+            survivors_needed = math.ceil(len(individuals) * self.survivor_ratio) - (len(individuals) - len(misses))
+            count = min(len(misses), max(1, survivors_needed, math.ceil(len(misses) * self.screening_fraction)))
+            selected = sorted(misses, key=lambda i: estimates[i], reverse=True)[:count]
 
-    def evaluate_fitnesses(self):
-        return [(ind, self.compute_fitness(ind)) for ind in self.population]
+        for i, fitness in zip(selected, self.compute_fitnesses([individuals[i] for i in selected])):
+            fitnesses[i] = fitness
+        if selected is misses:
+            if len(misses) >= 2:
+                self.rank_correlations.append(rank_correlation([estimates[i] for i in misses],
+                                                               [fitnesses[i] for i in misses]))
+        else:
+            self.screened_out += len(misses) - len(selected)
+            self.unscored = set(misses) - set(selected)
+        return [-float('inf') if fitness is None else fitness for fitness in fitnesses]
 
     def select_best(self, scored_population):
         return max(scored_population, key=lambda item: item[1])[0]
@@ -86,25 +240,40 @@ class Tournament:
         child = deepcopy(parent)
         child.children_count = 0
         child.mutate()
-        child.genealogy = parent.genealogy + [parent.children_count]
+        child.lineage_id = parent.lineage.add(parent.lineage_id, parent.children_count)
         parent.children_count += 1
         return child
 
     def new_generation(self, scored_population):
         scored_population.sort(key=lambda x: x[1], reverse=True)
-        survivors = [ind for ind, _ in scored_population[:max(1, int(len(scored_population) * self.survivor_ratio))]]
-        new_population = [deepcopy(survivors[0])] if self.elite else []
+        survivors = scored_population[:max(1, int(len(scored_population) * self.survivor_ratio))]
+        new_population = []
+        if self.elite:
+            elite = deepcopy(survivors[0][0])
+            self.elite_individual, self.elite_fitness = elite, survivors[0][1]
+            new_population.append(elite)
 
-        for survivor in survivors:
+        # (parent fitness, children), for the next generation's step-size adaptation
+        self.families = []
+        for survivor, fitness in survivors:
+            children = []
             for _ in range(4):
                 child = survivor.reproduce()
                 self.apply_target_region_color(child)
-                new_population.append(child)
+                children.append(child)
+            new_population.extend(children)
+            self.families.append((fitness, children))
 
         self.population = new_population
 
     def step(self) -> AbstractIndividual:
         scored = self.evaluate_fitnesses()
         best = self.select_best(scored)
+        best_fitness = max(fitness for _, fitness in scored)
+        self.generations += 1
+        if best_fitness > self.best_fitness:
+            self.best_fitness = best_fitness
+            self.evaluations_to_best = self.evaluations - self.evaluations_at_start
+            self.generations_to_best = self.generations
         self.new_generation(scored)
         return best
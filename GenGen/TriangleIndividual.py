@@ -1,4 +1,4 @@
-from PIL import Image, ImageDraw, ImageStat
+from PIL import Image, ImageDraw
 import random
 from typing import Optional, Tuple
 from copy import deepcopy
@@ -6,13 +6,13 @@ import math
 import numpy as np
 
 from .AbstractIndividual import AbstractIndividual
+from .Compositing import to_coverage
 
 class TriangleIndividual(AbstractIndividual):
     def __init__(self, **kwargs):
         self.MAX_INITIAL_AREA_COVERAGE = 0.5
         self.MIN_SIDE = 4
         self.points: tuple[int, int, int]
-        self._image = None
         super().__init__(**kwargs)
     def get_position(self):
         return self.position
@@ -20,14 +20,6 @@ class TriangleIndividual(AbstractIndividual):
     def get_canvas_size(self):
         return self.canvas_size
 
-    @property
-    def image(self):
-        return self._image
-
-    def get_transformed_bbox(self):
-        x, y = self.position
-        return (x, y, x + self._image.width, y + self._image.height)
-
     def reset_attributes(self, canvas_size):
         self.canvas_size = canvas_size
         self.center = (random.randint(0, canvas_size[0]), random.randint(0, canvas_size[1]))
@@ -94,10 +86,11 @@ class TriangleIndividual(AbstractIndividual):
         width = max_x - min_x
         height = max_y - min_y
 
-        self._image = Image.new("RGBA", (width + 1, height + 1), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(self._image)
+        mask = Image.new("L", (width + 1, height + 1), 0)
+        draw = ImageDraw.Draw(mask)
         adjusted_points = [(x - min_x, y - min_y) for (x, y) in self.points]
-        draw.polygon(adjusted_points, fill=(255, 255, 255, 255))
+        draw.polygon(adjusted_points, fill=255)
+        self._coverage = to_coverage(mask)
         if not hasattr(self, 'center') or self.center == (0, 0):
             self.center = (min_x + width // 2, min_y + height // 2)
         self.position = (
@@ -106,35 +99,20 @@ class TriangleIndividual(AbstractIndividual):
         )
 
     def mutate(self):
-        self.points = [(x + random.randint(-5, 5), y + random.randint(-5, 5)) for (x, y) in self.points]
-        self.center = (self.center[0] + random.randint(-10, 10), self.center[1] + random.randint(-10, 10))
+        self.points = [(x + round(self.jitter(5)), y + round(self.jitter(5))) for (x, y) in self.points]
+        self.center = (self.center[0] + round(self.jitter(10)), self.center[1] + round(self.jitter(10)))
         self.apply_transformations()
 
+    def genome_key(self):
+        return (type(self).__name__, tuple(self.points), self.center, self.color)
+
     def reproduce(self):
         child = deepcopy(self)
         child.children_count = 0
-        child.genealogy = self.genealogy + [self.children_count]
+        child.lineage_id = self.lineage.add(self.lineage_id, self.children_count)
         self.children_count += 1
         child.mutate()
         return child
 
-    def recolor_to_region(self, region_img: Image.Image):
-        mean_color = tuple(map(int, ImageStat.Stat(region_img.convert("RGB")).mean))
-
-        # Recreate the blank transparent image
-        min_x = min(p[0] for p in self.points)
-        max_x = max(p[0] for p in self.points)
-        min_y = min(p[1] for p in self.points)
-        max_y = max(p[1] for p in self.points)
-        width = max_x - min_x
-        height = max_y - min_y
-
-        self._image = Image.new("RGBA", (width + 1, height + 1), (0, 0, 0, 0))
-        adjusted_points = [(x - min_x, y - min_y) for (x, y) in self.points]
-
-        draw = ImageDraw.Draw(self._image)
-        draw.polygon(adjusted_points, fill=(*mean_color, 255))
-
-
     def __str__(self):
         return f"TriangleIndividual(name={self.name}, points={self.points}, position={self.position}\nGenealogy={self.genealogy})"
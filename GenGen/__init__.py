@@ -5,6 +5,10 @@ from .Tournament import Tournament
 from .AbstractIndividual import AbstractIndividual
 from .CircleIndividual import CircleIndividual
 from .CustomImageIndividual import CustomImageIndividual
+from .Sprite import Sprite
+from .TargetCache import TargetCache
 from .RectangleIndividual import RectangleIndividual
 from .TriangleIndividual import TriangleIndividual
-from .Individual import Individual
\ No newline at end of file
+from .Individual import Individual
+from .StrokeEvent import StrokeEvent
+from .DistributedEvaluator import DistributedEvaluator, spawn_local_workers
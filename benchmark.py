@@ -0,0 +1,64 @@
+import contextlib
+import io
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+import GenGen as gg
+
+# Usage: python benchmark.py [target_image_path]
+target_image_path = sys.argv[1] if len(sys.argv) > 1 else "ressources/target_images/totoro-xs.jpg"
+
+# Each entry is one run; keyword arguments are passed straight to GeneticImageGenerator
+configurations = {
+    "fixed mutation": dict(),
+    "adaptive mutation": dict(adaptive_mutation=True),
+    "no fitness cache": dict(cache_fitness=False),
+    "proxy screening 50%": dict(screening_fraction=0.5),
+    "orientation seeding": dict(orientation_seeding=True),
+}
+
+
+def make_population():
+    return [
+        gg.CircleIndividual(replication_factor=16),
+        gg.TriangleIndividual(replication_factor=16),
+        gg.RectangleIndividual(replication_factor=16),
+    ]
+
+
+def run(name, kwargs, seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = gg.GeneticImageGenerator(
+            population=make_population(),
+            target_image_path=target_image_path,
+            generations=7,
+            tournament_size=100,
+            output_name="benchmark",
+            output_dir=output_dir,
+            enable_display=False,
+            save_timelapse=False,
+            **kwargs
+        )
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.generate()
+        elapsed = time.perf_counter() - start
+    evaluations = generator.tournament.evaluations
+    per_stroke = evaluations / generator.committed_strokes if generator.committed_strokes else float('inf')
+    print(f"{name:<24} strokes={generator.committed_strokes:<5} evaluations={evaluations:<7} "
+          f"evaluations/stroke={per_stroke:<8.1f} "
+          f"evaluations-to-best/stroke={generator.evaluations_to_best / max(1, generator.committed_strokes):<8.1f} "
+          f"generations-to-best/stroke={generator.generations_to_best / max(1, generator.committed_strokes):<6.2f} "
+          f"gain={generator.total_gain:<12.0f} "
+          f"gain/evaluation={generator.total_gain / max(1, evaluations):<8.2f} time={elapsed:.1f}s")
+    if generator.tournament.rank_correlations:
+        print(f"{'':<24} proxy rank correlation={np.mean(generator.tournament.rank_correlations):.2f} "
+              f"exact evaluations saved={generator.tournament.screened_out}")
+
+
+for name, kwargs in configurations.items():
+    run(name, kwargs)
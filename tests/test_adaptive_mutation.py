@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import GenGen as gg
+from GenGen.AbstractIndividual import adapt_mutation_scale
+from GenGen.Canvas import Canvas
+from GenGen.Tournament import Tournament
+
+
+def make_tournament():
+    random.seed(0)
+    np.random.seed(0)
+    target = Image.new("RGB", (64, 48), (30, 60, 90))
+    ImageDraw.Draw(target).ellipse((10, 5, 40, 35), fill=(220, 180, 40))
+    population = [gg.CircleIndividual(replication_factor=20)]
+    return Tournament(population, target, Canvas(target.size, target), adaptive_mutation=True)
+
+
+def test_rule_is_stationary_at_one_in_five():
+    assert adapt_mutation_scale(1.0, 0.2) == 1.0
+    assert adapt_mutation_scale(1.0, 0.1) < 1.0
+    assert adapt_mutation_scale(1.0, 0.5) > 1.0
+
+
+def test_scale_shrinks_when_children_rarely_beat_their_parents():
+    tournament = make_tournament()
+    for _ in range(5):
+        scored = tournament.evaluate_fitnesses()
+        # Parents that no child can beat: the success rate is 0, below 1/5
+        tournament.new_generation([(ind, 1e12) for ind, _ in scored])
+    tournament.evaluate_fitnesses()
+
+    assert tournament.success_rates[-1] < 0.2
+    assert tournament.mutation_scale < 1.0
+    assert all(ind.mutation_scale == tournament.mutation_scale for ind in tournament.population)
+
+
+def test_scale_grows_when_children_usually_beat_their_parents():
+    tournament = make_tournament()
+    scored = tournament.evaluate_fitnesses()
+    tournament.new_generation([(ind, -1e12) for ind, _ in scored])
+    tournament.evaluate_fitnesses()
+
+    assert tournament.success_rates[-1] > 0.2
+    assert tournament.mutation_scale > 1.0
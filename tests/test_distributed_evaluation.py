@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import GenGen as gg
+from GenGen.Canvas import Canvas
+from GenGen.Tournament import Tournament
+
+AUTHKEY = b"gengen-test"
+
+
+@pytest.fixture(scope="module")
+def workers():
+    addresses, processes = gg.spawn_local_workers(2, authkey=AUTHKEY)
+    yield addresses
+    for process in processes:
+        process.terminate()
+
+
+def make_target():
+    image = Image.new("RGB", (64, 48), (30, 60, 90))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((10, 5, 40, 35), fill=(220, 180, 40))
+    draw.rectangle((35, 20, 60, 44), fill=(20, 200, 120))
+    return image
+
+
+def make_sprite():
+    image = Image.new("RGBA", (24, 16), (0, 0, 0, 0))
+    ImageDraw.Draw(image).polygon([(0, 15), (12, 0), (23, 15)], fill=(200, 120, 60, 255))
+    return image
+
+
+def test_distributed_scores_match_local(workers):
+    random.seed(0)
+    np.random.seed(0)
+    target = make_target()
+    canvas = Canvas(target.size, target)
+    population = [
+        gg.CircleIndividual(replication_factor=6),
+        gg.TriangleIndividual(replication_factor=6),
+        gg.RectangleIndividual(replication_factor=6),
+        gg.CustomImageIndividual(make_sprite(), recoloring_method="grayscale_tint", replication_factor=6),
+    ]
+    tournament = Tournament(population, target, canvas, cache_fitness=False)
+    evaluator = gg.DistributedEvaluator(workers, target, target.size, authkey=AUTHKEY)
+    try:
+        for _ in range(3):
+            candidates = tournament.population
+            local = tournament.compute_fitnesses(candidates)
+            remote = evaluator.evaluate(candidates, canvas)
+            assert remote == pytest.approx(local, rel=1e-5)
+            # Commit the best, so the next round also checks the dirty-rect deltas
+            canvas.apply_individual(max(zip(candidates, local), key=lambda item: item[1])[0])
+            tournament.reinitialise()
+    finally:
+        evaluator.close()
+
+    with pytest.raises(RuntimeError):
+        evaluator.evaluate(tournament.population, canvas)
+
+
+def test_workers_refuse_to_start_without_authkey(monkeypatch):
+    monkeypatch.delenv("GENGEN_AUTHKEY", raising=False)
+    with pytest.raises(ValueError):
+        gg.spawn_local_workers(1)